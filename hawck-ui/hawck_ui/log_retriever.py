@@ -28,9 +28,12 @@
 ## ================================================================================
 
 import re
-import json
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 from subprocess import Popen, PIPE, STDOUT as STDOUT_REDIR
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import os
 import threading
 import time
@@ -39,15 +42,19 @@ from gi.repository import GLib
 
 from .locations import HAWCK_HOME, LOCATIONS
 
+LUA_ERR_RX = re.compile(r"^(.+?):(\d+): (.*)", re.MULTILINE | re.DOTALL)
+
 class LogRetriever(threading.Thread):
     def __init__(self, gdk_callback: Callable[[list, int], bool]):
         super().__init__()
         self.gdk_callback = gdk_callback
-        self.logs = {}
+        self.logs = OrderedDict()
         self.max_logs = 200
         self.last_time = 0
+        self.last_log_text = b""
         self.dismissed = set()
         self.running = True
+        self.wakeup = threading.Event()
 
     def run(self):
         GLib.threads_init()
@@ -59,7 +66,15 @@ class LogRetriever(threading.Thread):
             while not self.running:
                 time.sleep(1)
 
-            time.sleep(0.5)
+            self.wakeup.wait(0.5)
+            self.wakeup.clear()
+
+    def refresh(self):
+        """
+        Ask the retriever thread to update immediately instead of waiting
+        for the next poll, new logs are delivered through gdk_callback.
+        """
+        self.wakeup.set()
 
     def stop(self):
         self.running = False
@@ -67,15 +82,15 @@ class LogRetriever(threading.Thread):
     def resume(self):
         self.running = True
 
+    @staticmethod
     def mklog(log):
         """
         Warning: This function modifies the log passed to it,
                  the same log object is then returned for convenience.
         """
-        lua_err_rx = re.compile(r"^(.+):(\d)+: (.*)", re.MULTILINE | re.DOTALL)
         log["TYPE"], _, log["MESSAGE"] = log["MESSAGE"].partition(":")
         if log["TYPE"].upper() == "LUA":
-            m = lua_err_rx.match(log["MESSAGE"])
+            m = LUA_ERR_RX.match(log["MESSAGE"])
             if not m:
                 m = ("<unknown>", 1, log["MESSAGE"])
             else:
@@ -101,10 +116,16 @@ class LogRetriever(threading.Thread):
         Returns None if nothing changed.
         """
         p = Popen(["journalctl", "-n", "1000", "-o", "json"], stdout=PIPE)
+        out, _ = p.communicate()
+
+        ## Nothing was logged since the last update
+        if out == self.last_log_text:
+            return
+        self.last_log_text = out
 
         logs = []
-        for i, line in enumerate(reversed(p.stdout.readlines())):
-            obj = json.loads(line.decode("utf-8").strip())
+        for i, line in enumerate(reversed(out.splitlines())):
+            obj = json_loads(line)
             if os.path.basename(obj.get("_EXE", "")) != "hawck-macrod":
                 continue
             obj = LogRetriever.mklog(obj)
@@ -113,8 +134,6 @@ class LogRetriever(threading.Thread):
                 break
             logs.append(obj)
 
-        p.kill()
-
         if not logs:
             return
 
@@ -124,6 +143,9 @@ class LogRetriever(threading.Thread):
             if msg not in self.logs:
                 log["DUP"] = 1
                 self.logs[msg] = log
+                ## Evict the oldest log once we go over the cap
+                if len(self.logs) > self.max_logs:
+                    self.logs.popitem(last=False)
             else:
                 self.logs[msg]["DUP"] += 1
         self.last_time = log["UTIME"]
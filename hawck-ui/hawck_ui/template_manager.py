@@ -39,9 +39,7 @@ class TemplateManager:
 
     ## Get builder instance of template
     def get(self, name):
-        src = self.templates[name]
-        builder = Gtk.Builder()
-        builder.add_from_string(src)
+        builder = Gtk.Builder.new_from_string(self.templates[name], -1)
         root = builder.get_object("root")
         ## Make sure Python keeps the reference
         root.builder = builder
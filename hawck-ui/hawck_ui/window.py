@@ -33,8 +33,10 @@ import shutil
 import signal
 import errno
 import inspect
+import logging
 import re
 import pkg_resources as pkg
+from collections import OrderedDict
 from subprocess import Popen, PIPE, STDOUT
 from pprint import PrettyPrinter
 from functools import wraps
@@ -58,6 +60,7 @@ from cfgmsg import sendMacroD
 sendMacroD
 
 pprint = PrettyPrinter(indent = 4).pprint
+logger = logging.getLogger(__name__)
 
 SCRIPT_DEFAULT = """
 -- Happy hacking.
@@ -311,6 +314,18 @@ class HawckMainWindow(MainWindow):
             **kwargs
         )
 
+        ## Widgets that are used often enough to not look them up every time
+        self.edit_notebook = self.builder.get_object("edit_notebook")
+        self.script_error_buffer = self.builder.get_object("script_error_buffer")
+        self.script_error_list = self.builder.get_object("script_error_list")
+        self.script_enabled_switch = self.builder.get_object("script_enabled_switch")
+        self.key_capture_window = self.builder.get_object("key_capture_window")
+        self.key_capture_display = self.builder.get_object("key_capture_display")
+        self.main_stack = self.builder.get_object("main_stack")
+        self.edit_script_box = self.builder.get_object("edit_script_box")
+        self.inputd_status = self.builder.get_object("inputd_status")
+        self.macrod_status = self.builder.get_object("macrod_status")
+
         self.window.set_icon_name("hawck")
         self.window.set_default_icon_name("hawck")
 
@@ -321,21 +336,20 @@ class HawckMainWindow(MainWindow):
         script_dir = LOCATIONS["scripts"]
         self.src_lang_manager = GtkSource.LanguageManager()
         self.scheme_manager = GtkSource.StyleSchemeManager()
-        for fname in os.listdir(script_dir):
-            _, ext = os.path.splitext(fname)
-            if ext == ".hwk":
-                self.addEditPage(os.path.join(script_dir, fname))
+        with os.scandir(script_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".hwk") and entry.is_file():
+                    self.addEditPage(entry.path)
         self.insert_key_handler_id = self.connect("onKeyCaptureDone", self.insertKeyHandler)
         self.handler_block(self.insert_key_handler_id)
-        script_sw = self.builder.get_object("script_enabled_switch")
-        self.script_switch_handler_id = script_sw.connect("state-set", self.setScriptEnabled)
+        self.script_switch_handler_id = self.script_enabled_switch.connect("state-set", self.setScriptEnabled)
         self.prepareEditForPage(0)
         self.checkHawckDRunning()
 
         ## Key capture stuff
         ## TODO: Separate the key capturing into its own class
-        self.keycap_names = []
-        self.keycap_codes = []
+        ## Maps captured key names to their hardware keycodes, in capture order
+        self.keycap = OrderedDict()
         self.keycap_done = False
 
         self.templates = TemplateManager("resources/glade-xml/")
@@ -352,8 +366,7 @@ class HawckMainWindow(MainWindow):
         hawck_about = self.builder.get_object("hawck_about_dialog")
         hawck_about.set_version(self.version)
 
-        notebook = self.builder.get_object("edit_notebook")
-        notebook.set_current_page(0)
+        self.edit_notebook.set_current_page(0)
 
         self.settings = Settings(builder = self.builder)
         signals = {}
@@ -387,12 +400,10 @@ class HawckMainWindow(MainWindow):
         auto_sw.handler_unblock_by_func(self.onSetAutostart)
 
     def updateLogs(self, added):
-        loglist = self.builder.get_object("script_error_list")
-
         Gdk.threads_enter()
 
         for row in self.log_rows:
-            loglist.remove(row)
+            self.script_error_list.remove(row)
         self.log_rows = []
 
         for log in (l for l in added if l["TYPE"] == "LUA"):
@@ -405,23 +416,19 @@ class HawckMainWindow(MainWindow):
             num_dup_label = builder.get_object("num_duplicates")
             num_dup_label.set_text(str(log.get("DUP", 1)))
             def openScript(*_):
-                edit_pg = self.builder.get_object("edit_script_box")
-                stack = self.builder.get_object("main_stack")
-                edit_notebook = self.builder.get_object("edit_notebook")
                 sname = HawckMainWindow.getScriptName(log["LUA_FILE"])
                 script = self.scripts[sname]
                 pagenr = script["pagenr"]
                 view = script["view"]
                 buf = script["buffer"]
-                edit_notebook.set_current_page(pagenr)
-                stack.set_visible_child(edit_pg)
+                self.edit_notebook.set_current_page(pagenr)
+                self.main_stack.set_visible_child(self.edit_script_box)
                 text_iter = buf.get_start_iter()
                 text_iter.set_line(log["LUA_LINE"])
                 # mark = Gtk.TextMark()
                 # buf.add_mark(mark, text_iter)
                 view.scroll_to_iter(text_iter, 0, True, 0.0, 0.17)
-                errbuf = self.builder.get_object("script_error_buffer")
-                errbuf.set_text(f"{sname}:{log['LUA_LINE']}: {log['LUA_ERROR']}")
+                self.script_error_buffer.set_text(f"{sname}:{log['LUA_LINE']}: {log['LUA_ERROR']}")
             def dismissError(*_):
                 err = log["MESSAGE"]
                 self.logs.dismiss(err)
@@ -429,19 +436,18 @@ class HawckMainWindow(MainWindow):
             open_btn.connect("clicked", openScript)
             dismiss_btn = builder.get_object("error_script_btn_dismiss")
             dismiss_btn.connect("clicked", dismissError)
-            loglist.prepend(row)
-            loglist.show_all()
+            self.script_error_list.prepend(row)
             self.log_rows.append(row)
-            row.show_all()
+
+        ## Show all new rows at once, rather than relayouting for each one
+        self.script_error_list.show_all()
 
         Gdk.threads_leave()
 
         return False
 
     def onClickUpdateLogs(self, *_):
-        ret = self.logs.update()
-        if ret:
-            self.updateLogs(*ret)
+        self.logs.refresh()
 
     ## TODO: Write this
     def onToggleAutoUpdateLog(self, btn):
@@ -457,19 +463,17 @@ class HawckMainWindow(MainWindow):
         src_view.set_vexpand(True)
         buf = src_view.get_buffer()
         lua_lang = self.src_lang_manager.get_language("lua")
-        # print(f"Schemes: {self.scheme_manager.get_scheme_ids()}")
         scheme = self.scheme_manager.get_scheme("oblivion")
         buf.set_language(lua_lang)
         buf.set_style_scheme(scheme)
         with open(path) as f:
             buf.set_text(f.read())
         name = os.path.basename(path)
-        notebook = self.builder.get_object("edit_notebook")
         scrolled_window.add(src_view)
-        notebook.append_page(scrolled_window, Gtk.Label(name))
-        notebook.show_all()
+        self.edit_notebook.append_page(scrolled_window, Gtk.Label(name))
+        self.edit_notebook.show_all()
         pagenr = len(self.edit_pages)
-        notebook.set_current_page(pagenr)
+        self.edit_notebook.set_current_page(pagenr)
         self.edit_pages.append(path)
         sname = HawckMainWindow.getScriptName(path)
         self.scripts[sname] = {
@@ -493,13 +497,12 @@ class HawckMainWindow(MainWindow):
         if pagenr >= len(self.edit_pages):
             return
 
-        switch_obj = self.builder.get_object("script_enabled_switch")
         name = HawckMainWindow.getScriptName(self.edit_pages[pagenr])
         enabled_path = os.path.join(LOCATIONS["scripts-enabled"], name + ".lua")
         is_enabled = os.path.exists(enabled_path)
-        with switch_obj.handler_block(self.script_switch_handler_id):
-            switch_obj.set_state(is_enabled)
-            switch_obj.set_active(is_enabled)
+        with self.script_enabled_switch.handler_block(self.script_switch_handler_id):
+            self.script_enabled_switch.set_state(is_enabled)
+            self.script_enabled_switch.set_active(is_enabled)
 
     def onEditChangePage(self, _notebook: Gtk.Notebook, _obj, pagenr: int):
         self.prepareEditForPage(pagenr)
@@ -507,8 +510,7 @@ class HawckMainWindow(MainWindow):
     onEditSwitchPage = onEditChangePage
 
     def getCurrentEditFile(self):
-        notebook = self.builder.get_object("edit_notebook")
-        return self.edit_pages[notebook.get_current_page()]
+        return self.edit_pages[self.edit_notebook.get_current_page()]
 
     def onNewScriptOK(self, *_):
         popover = self.builder.get_object("new_script_popover")
@@ -522,8 +524,7 @@ class HawckMainWindow(MainWindow):
         self.addEditPage(path)
 
     def getCurrentBuffer(self):
-        notebook = self.builder.get_object("edit_notebook")
-        view = notebook.get_nth_page(notebook.get_current_page()).get_child()
+        view = self.edit_notebook.get_nth_page(self.edit_notebook.get_current_page()).get_child()
         return view.get_buffer()
 
     def onTest(self, *_):
@@ -577,7 +578,6 @@ class HawckMainWindow(MainWindow):
 
     def useScript(self, *_):
         current_file = self.getCurrentEditFile()
-        buf = self.builder.get_object("script_error_buffer")
         try:
             self.installScript(current_file)
         except HawckInstallException as e:
@@ -586,9 +586,9 @@ class HawckMainWindow(MainWindow):
             ##       in the text editor margin.
             popover = self.builder.get_object("use_script_error")
             popover.popup()
-            buf.set_text(str(e))
+            self.script_error_buffer.set_text(str(e))
             return
-        buf.set_text("OK")
+        self.script_error_buffer.set_text("OK")
         popover = self.builder.get_object("use_script_success")
         popover.popup()
         HawckMainWindow.enableScript(self.getCurrentScriptName())
@@ -609,8 +609,7 @@ class HawckMainWindow(MainWindow):
             print(f"e: {e}")
 
     def pagesIter(self):
-        notebook = self.builder.get_object("edit_notebook")
-        return map(notebook.get_nth_page, range(notebook.get_n_pages()))
+        return map(self.edit_notebook.get_nth_page, range(self.edit_notebook.get_n_pages()))
 
     def warnOverwrite(self, path: str) -> None:
         r = Gtk.ResponseType.YES
@@ -621,11 +620,10 @@ class HawckMainWindow(MainWindow):
             m.destroy()
             ## Delete the notebook currently corresponding to `path`
             if r == Gtk.ResponseType.YES:
-                notebook = self.builder.get_object("edit_notebook")
-                labels = map(notebook.get_tab_label, self.pagesIter())
+                labels = map(self.edit_notebook.get_tab_label, self.pagesIter())
                 for i, page_label in enumerate(labels):
                     if os.path.basename(path) == page_label.get_text():
-                        notebook.remove_page(i)
+                        self.edit_notebook.remove_page(i)
                         break
         return r == Gtk.ResponseType.YES
 
@@ -662,9 +660,8 @@ class HawckMainWindow(MainWindow):
         elif os.path.exists(newlnk):
             os.unlink(newlnk)
 
-        notebook = self.builder.get_object("edit_notebook")
-        view = notebook.get_nth_page(notebook.get_current_page())
-        notebook.set_tab_label(view, Gtk.Label(newname + ".hwk"))
+        view = self.edit_notebook.get_nth_page(self.edit_notebook.get_current_page())
+        self.edit_notebook.set_tab_label(view, Gtk.Label(newname + ".hwk"))
 
     def setScriptEnabled(self, switch_obj: Gtk.Switch, enabled: bool):
         hwk_path = self.getCurrentEditFile()
@@ -673,21 +670,20 @@ class HawckMainWindow(MainWindow):
         if not enabled:
             return HawckMainWindow.disableScript(name)
 
-        buf = self.builder.get_object("script_error_buffer")
         try:
-            print("Installing script ...")
+            logger.debug("Installing script %s ...", hwk_path)
             self.installScript(hwk_path)
-            print("Success!")
+            logger.debug("Installed %s", hwk_path)
         except HawckInstallException as e:
-            print("EXCEPTION")
+            logger.debug("Unable to install %s: %s", hwk_path, e)
             popover = self.builder.get_object("use_script_error")
             popover.popup()
-            buf.set_text(str(e))
+            self.script_error_buffer.set_text(str(e))
             switch_obj.set_active(False)
             switch_obj.set_state(False)
             return True
 
-        buf.set_text("OK")
+        self.script_error_buffer.set_text("OK")
 
         HawckMainWindow.enableScript(name)
 
@@ -697,12 +693,11 @@ class HawckMainWindow(MainWindow):
         popover = self.builder.get_object("delete_script_popover")
         popover.popdown()
         path = self.getCurrentEditFile()
-        notebook = self.builder.get_object("edit_notebook")
-        page_num = notebook.get_current_page()
+        page_num = self.edit_notebook.get_current_page()
         pg = self.edit_pages
         name = self.getCurrentScriptName()
         HawckMainWindow.disableScript(name)
-        notebook.remove_page(page_num)
+        self.edit_notebook.remove_page(page_num)
         self.edit_pages = pg[:page_num] + pg[page_num+1:]
         os.remove(path)
 
@@ -728,7 +723,7 @@ class HawckMainWindow(MainWindow):
 
     def insertKeyHandler(self, window, names, codes):
         self.handler_block(self.insert_key_handler_id)
-        print(f"Captured: {names}")
+        logger.debug("Captured: %s", names)
         buf = self.getCurrentBuffer()
         text = "down + "
         text += " + ".join(n.lower() for n in names[:-1])
@@ -740,22 +735,23 @@ class HawckMainWindow(MainWindow):
         self.captureKey()
 
     def checkHawckDRunning(self):
-        inputd_label = self.builder.get_object("inputd_status")
-        macrod_label = self.builder.get_object("macrod_status")
         pgrep_loc = "pgrep"
 
         run_str = "<tt><span fgcolor=\"#4CB940\" font_weight=\"bold\">Running</span></tt>" 
         stop_str = "<tt><span fgcolor=\"#BF4040\" font_weight=\"bold\">Stopped</span></tt>"
 
-        ret = Popen([pgrep_loc, "hawck-inputd"]).wait()
-        inputd_label.set_markup(run_str if not ret else stop_str)
+        ## Check for both daemons with a single pgrep, `-l` lists the process names.
+        ## pgrep rejects patterns longer than 15 characters, so match on the
+        ## common prefix and compare the full names below.
+        p = Popen([pgrep_loc, "-l", "hawck-"], stdout=PIPE)
+        out, _ = p.communicate()
+        running = {line.split()[-1].decode("utf-8") for line in out.splitlines() if line.strip()}
 
-        ret = Popen([pgrep_loc, "hawck-macrod"]).wait()
-        macrod_label.set_markup(run_str if not ret else stop_str)
+        self.inputd_status.set_markup(run_str if "hawck-inputd" in running else stop_str)
+        self.macrod_status.set_markup(run_str if "hawck-macrod" in running else stop_str)
 
     def onNewFocus(self, *_):
-        stack = self.builder.get_object("main_stack")
-        print(f"Focus change: {stack.get_visible_child_name()}")
+        print(f"Focus change: {self.main_stack.get_visible_child_name()}")
 
     def onPanicBtn(self, *_):
         Popen(["killall", "-9", "hawck-macrod"]).wait()
@@ -763,16 +759,13 @@ class HawckMainWindow(MainWindow):
         self.checkHawckDRunning()
 
     def onKeyCaptureCancel(self, *_):
-        win = self.builder.get_object("key_capture_window")
-        win.hide()
+        self.key_capture_window.hide()
 
     def onKeyCaptureOK(self, *_):
-        win = self.builder.get_object("key_capture_window")
-        win.hide()
-        names = self.keycap_names
-        codes = self.keycap_codes
-        self.keycap_names = []
-        self.keycap_codes = []
+        self.key_capture_window.hide()
+        names = list(self.keycap)
+        codes = list(self.keycap.values())
+        self.keycap = OrderedDict()
         self.emit("onKeyCaptureDone", names, codes)
 
     def onKeyCaptureKeyRelease(self, window, ev):
@@ -784,17 +777,13 @@ class HawckMainWindow(MainWindow):
         is_modifier = ev_name in MODIFIER_NAMES
         if not is_modifier and len(ev_name) == 1:
             ev_name = ev_name.upper()
-        try:
-            idx = self.keycap_names.index(ev_name)
-            self.keycap_codes.remove(self.keycap_codes[idx])
-            self.keycap_names.remove(ev_name)
-        except ValueError:
+        if ev_name not in self.keycap:
             return
-        self.setKeyCaptureLabel(self.keycap_names)
+        del self.keycap[ev_name]
+        self.setKeyCaptureLabel(list(self.keycap))
 
     def onKeyCaptureReset(self, *_):
-        self.keycap_names = []
-        self.keycap_codes = []
+        self.keycap = OrderedDict()
         self.keycap_done = False
         self.setKeyCaptureLabel([])
 
@@ -805,26 +794,17 @@ class HawckMainWindow(MainWindow):
         oname = ev.string.strip()
         ev_name = oname or Gdk.keyval_name(ev.keyval)
 
-        # print(f"name: {ev_name}")
-        # print(f"ev.keycode: {ev.keyval}")
-        # print(f"ev.hardware_keycode: {ev.hardware_keycode}")
-        # print(f"ev.string.strip(): {oname}")
-        # print(f"Gdk.keyval_name(ev.keyval): {Gdk.keyval_name(ev.keyval)}")
-        # print(f"Gdk.keyval_to_unicode(ev.keyval): {Gdk.keyval_to_unicode(ev.keyval)}")
-        # print("")
-
         is_modifier = ev_name in MODIFIER_NAMES
 
         if not is_modifier and len(ev_name) == 1:
             ev_name = ev_name.upper()
 
         ## Repeat key
-        if self.keycap_names and self.keycap_names[-1] == ev_name:
+        if next(reversed(self.keycap), None) == ev_name:
             return
 
-        self.keycap_names.append(ev_name)
-        self.keycap_codes.append(ev.hardware_keycode)
-        self.setKeyCaptureLabel(self.keycap_names)
+        self.keycap[ev_name] = ev.hardware_keycode
+        self.setKeyCaptureLabel(list(self.keycap))
 
         ## Check if we received a terminal key:
         if not is_modifier:
@@ -832,20 +812,18 @@ class HawckMainWindow(MainWindow):
 
     def setKeyCaptureLabel(self, names):
         fmt = " - ".join(names)
-        label = self.builder.get_object("key_capture_display")
-        label.set_text(fmt)
+        self.key_capture_display.set_text(fmt)
 
     @GObject.Signal(flags=GObject.SignalFlags.RUN_LAST,
                     arg_types=(object, object),
                     return_type=bool,
                     accumulator=GObject.signal_accumulator_true_handled)
     def onKeyCaptureDone(self, *_):
-        print(f"Keycap done: {_}")
+        logger.debug("Keycap done: %s", _)
         self.onKeyCaptureReset()
 
     def captureKey(self):
-        win = self.builder.get_object("key_capture_window")
-        win.show_all()
+        self.key_capture_window.show_all()
 
     def onSearchKeyboardUpdate(self, *_):
         pass ## Not implemented